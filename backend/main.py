@@ -1,31 +1,52 @@
 import os
+import functools
 import boto3
-from fastapi import BackgroundTasks, FastAPI, UploadFile, File, HTTPException, Query
-from fastapi.responses import FileResponse
+from boto3.s3.transfer import TransferConfig
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query
+from fastapi.responses import RedirectResponse
 from mangum import Mangum
-from botocore.exceptions import ClientError, NoCredentialsError
+from starlette.formparsers import MultiPartParser
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
 from dotenv import load_dotenv
+import hashlib
+import hmac
 import logging
-import tempfile
+import operator
+import random
+import time
 
 # --- Configuration ---
 load_dotenv()  # Load .env file if present (for local development)
 
 AWS_REGION = os.getenv("AWS_REGION", "eu-west-3")
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
-SSM_PARAMETER_NAME = os.getenv("SSM_PARAMETER_NAME")
-SSM_FILENAME_PARAMETER_NAME = os.getenv("SSM_FILENAME_PARAMETER_NAME")
+DYNAMODB_LOCK_TABLE_NAME = os.getenv("DYNAMODB_LOCK_TABLE_NAME")
 SSM_PASSWORD_PARAMETER_NAME = os.getenv("SSM_PASSWORD_PARAMETER_NAME")
 LOCK_VALUE_UNLOCKED = "unlocked"
+# Compiled once by pydantic when the routes are declared
+WHO_ARE_YOU_PATTERN = r"^[A-Za-z0-9_.-]{1,20}$"
+LOCK_ITEM_KEY = {"lock_id": {"S": "save"}}
+SSM_CACHE_TTL = float(os.getenv("SSM_CACHE_TTL", "300"))  # seconds
+PRESIGNED_URL_EXPIRY = 120  # seconds
+# Large saves are sent as concurrent multipart uploads
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=16 * 1024 * 1024,
+    max_concurrency=10,
+    use_threads=True,
+)
+HTTP_BLOCKSIZE = 1024 * 1024  # 1 MiB
+UPLOAD_SPOOL_MAX_SIZE = int(os.getenv("UPLOAD_SPOOL_MAX_SIZE", "16777216"))  # 16 MiB
 
 if (
     not S3_BUCKET_NAME
-    or not SSM_PARAMETER_NAME
-    or not SSM_FILENAME_PARAMETER_NAME
+    or not DYNAMODB_LOCK_TABLE_NAME
     or not SSM_PASSWORD_PARAMETER_NAME
 ):
     raise ValueError(
-        "Missing required environment variables: S3_BUCKET_NAME, SSM_PARAMETER_NAME, SSM_FILENAME_PARAMETER_NAME, SSM_PASSWORD_PARAMETER_NAME"
+        "Missing required environment variables: S3_BUCKET_NAME, DYNAMODB_LOCK_TABLE_NAME, SSM_PASSWORD_PARAMETER_NAME"
     )
 
 # --- Logging ---
@@ -33,235 +54,431 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
 
 # --- AWS Clients ---
+# botocore sends request bodies through urllib3 in 16 KiB blocks by default.
+# Bigger blocks mean far fewer send() calls when pushing saves to S3.
+for connection_class in (HTTPConnection, HTTPSConnection):
+    connection_class.__init__.__kwdefaults__["blocksize"] = HTTP_BLOCKSIZE
+
+# Shared by all clients: pooled keepalive connections sized for the multipart
+# upload workers, and adaptive retries to back off when AWS throttles.
+# A failing call gives up after 2 attempts of at most 1 + 2 s plus up to 1 s of
+# backoff, ie 7 s. get_file makes at most 4 calls (password, lock, head, unlock),
+# so it stays under 28 s and surfaces as a 500 within the 30 s Lambda timeout.
+AWS_CLIENT_CONFIG = Config(
+    region_name=AWS_REGION,
+    max_pool_connections=50,
+    connect_timeout=1,
+    read_timeout=2,
+    retries={"total_max_attempts": 2, "mode": "adaptive"},
+    tcp_keepalive=True,
+)
+# urllib3 sends request bodies under the connect timeout, so uploads get
+# botocore's default 60 s timeouts for each 1 MiB block instead of the short ones
+S3_UPLOAD_CLIENT_CONFIG = AWS_CLIENT_CONFIG.merge(
+    Config(s3={"addressing_style": "virtual"}, connect_timeout=60, read_timeout=60)
+)
+# Single attempt for the import-time password prefetch, so it can never eat into
+# Lambda's 10 s init window
+PREFETCH_CLIENT_CONFIG = AWS_CLIENT_CONFIG.merge(
+    Config(retries={"total_max_attempts": 1, "mode": "adaptive"})
+)
+
 try:
-    s3_client = boto3.client("s3", region_name=AWS_REGION)
-    ssm_client = boto3.client("ssm", region_name=AWS_REGION)
+    session = boto3.Session()
+    # Virtual addressing makes presigned URLs use the regional S3 endpoint
+    s3_client = session.client(
+        "s3",
+        config=AWS_CLIENT_CONFIG.merge(Config(s3={"addressing_style": "virtual"})),
+    )
+    s3_upload_client = session.client("s3", config=S3_UPLOAD_CLIENT_CONFIG)
+    ssm_client = session.client("ssm", config=AWS_CLIENT_CONFIG)
+    dynamodb_client = session.client("dynamodb", config=AWS_CLIENT_CONFIG)
+    prefetch_ssm_client = session.client("ssm", config=PREFETCH_CLIENT_CONFIG)
+    # Calls bound once to the save bucket and lock item, so they cannot drift
+    s3_head_save = functools.partial(s3_client.head_object, Bucket=S3_BUCKET_NAME)
+    s3_upload_save = functools.partial(
+        s3_upload_client.upload_fileobj,
+        Bucket=S3_BUCKET_NAME,
+        Config=S3_TRANSFER_CONFIG,
+    )
+    lock_get_item = functools.partial(
+        dynamodb_client.get_item,
+        TableName=DYNAMODB_LOCK_TABLE_NAME,
+        Key=LOCK_ITEM_KEY,
+        ConsistentRead=True,
+    )
+    lock_update_item = functools.partial(
+        dynamodb_client.update_item,
+        TableName=DYNAMODB_LOCK_TABLE_NAME,
+        Key=LOCK_ITEM_KEY,
+    )
 except NoCredentialsError:
     logger.error("AWS credentials not found. Ensure they are configured correctly.")
     s3_client = None
+    s3_upload_client = None
     ssm_client = None
+    dynamodb_client = None
+    prefetch_ssm_client = None
+    s3_head_save = None
+    s3_upload_save = None
+    lock_get_item = None
+    lock_update_item = None
+
+# --- SSM Cache ---
+# Parameter name -> (expiry time, value). Only the password is cached, so warm
+# Lambda containers skip the SSM round-trip. Expiries are jittered so containers
+# started in the same burst do not all refresh from SSM at once.
+_ssm_cache: dict[str, tuple[float, str]] = {}
+# Pre-bound accessors for GetParameter responses
+_ssm_parameter = operator.itemgetter("Parameter")
+_ssm_parameter_value = operator.itemgetter("Value")
+# Keyed blake2b digest of an accepted password -> expiry time. Repeat callers
+# skip the password lookup, and accepted passwords are not kept in clear.
+_PASSWORD_DIGEST_KEY = os.urandom(32)
+_valid_password_digests: dict[bytes, float] = {}
 
 # --- FastAPI App ---
+# Uploaded files are spooled to disk past 1 MiB by default. Keep saves in memory
+# so they are sent to S3 without a write and read back through /tmp.
+MultiPartParser.spool_max_size = UPLOAD_SPOOL_MAX_SIZE
 app = FastAPI()
 
 
 # --- Helper Functions ---
+def _cache_expiry() -> float:
+    """Returns a monotonic expiry time SSM_CACHE_TTL from now, give or take 30%."""
+    return time.monotonic() + SSM_CACHE_TTL * random.uniform(0.7, 1.3)
+
+
+def _get_cached_ssm_value(parameter_name: str) -> str | None:
+    """Returns the cached value of an SSM parameter if it has not expired."""
+    if parameter_name not in _ssm_cache:
+        return None
+    expires_at, value = _ssm_cache[parameter_name]
+    if time.monotonic() < expires_at:
+        return value
+    return None
+
+
 def get_ssm_parameter(parameter_name: str, with_decryption: bool = False) -> str | None:
-    """Fetches the value of an SSM parameter."""
+    """Fetches the value of an SSM parameter, serving the password from cache."""
     if not ssm_client:
         return None
+    cacheable = with_decryption and parameter_name == SSM_PASSWORD_PARAMETER_NAME
+    if cacheable:
+        cached_value = _get_cached_ssm_value(parameter_name)
+        if cached_value is not None:
+            return cached_value
     try:
         response = ssm_client.get_parameter(
             Name=parameter_name, WithDecryption=with_decryption
         )
-        return response["Parameter"]["Value"]
+        value = _ssm_parameter_value(_ssm_parameter(response))
+        if cacheable:
+            _ssm_cache[parameter_name] = (_cache_expiry(), value)
+        return value
     except ssm_client.exceptions.ParameterNotFound:
-        logger.info(f"SSM Parameter '{parameter_name}' not found.")
+        logger.info("SSM Parameter '%s' not found.", parameter_name)
         return None
     except ClientError as e:
-        logger.error(f"Error getting SSM parameter '{parameter_name}': {e}")
+        logger.error("Error getting SSM parameter '%s': %s", parameter_name, e)
         raise HTTPException(
             status_code=500,
             detail=f"Error communicating with AWS SSM to get {parameter_name}",
         )
 
 
-def set_ssm_parameter(parameter_name: str, value: str, overwrite: bool = True) -> bool:
-    """Sets the value of an SSM parameter."""
-    if not ssm_client:
+def is_valid_password(password: str) -> bool:
+    """
+    Checks the provided password against the SSM one in constant time.
+    Accepted passwords are remembered for about SSM_CACHE_TTL seconds.
+    """
+    digest = hashlib.blake2b(password.encode(), key=_PASSWORD_DIGEST_KEY).digest()
+    expires_at = _valid_password_digests.get(digest)
+    if expires_at is not None and time.monotonic() < expires_at:
+        return True
+    app_password = get_ssm_parameter(SSM_PASSWORD_PARAMETER_NAME, with_decryption=True)
+    if app_password is None:
         return False
+    # Compare bytes, as compare_digest rejects non-ASCII str
+    if not hmac.compare_digest(app_password.encode(), password.encode()):
+        return False
+    _valid_password_digests[digest] = _cache_expiry()
+    return True
+
+
+def _parse_lock_item(item: dict) -> dict[str, str]:
+    """Flattens a DynamoDB lock item, eg {"owner": {"S": "x"}} into {"owner": "x"}."""
+    return {key: value["S"] for key, value in item.items()}
+
+
+def get_lock_value() -> str | None:
+    """Fetches the current lock value from DynamoDB."""
     try:
-        ssm_client.put_parameter(
-            Name=parameter_name, Value=value, Type="String", Overwrite=overwrite
+        response = lock_get_item()
+    except ClientError as e:
+        logger.error(
+            "Error getting lock from table '%s': %s", DYNAMODB_LOCK_TABLE_NAME, e
         )
-        logger.info(f"Successfully set SSM Parameter '{parameter_name}' to '{value}'.")
-        return True
+        raise HTTPException(
+            status_code=500,
+            detail="Error communicating with AWS DynamoDB to get the lock",
+        )
+    if "owner" not in response.get("Item", {}):
+        logger.info("Lock not found in table '%s'.", DYNAMODB_LOCK_TABLE_NAME)
+        return None
+    return response["Item"]["owner"]["S"]
+
+
+def set_lock_value(value: str, filename: str | None = None) -> None:
+    """
+    Unconditionally sets the lock value in DynamoDB.
+    If given, the save filename is updated in the same write.
+    """
+    update_expression = "SET #owner = :value"
+    attribute_names = {"#owner": "owner"}
+    attribute_values = {":value": {"S": value}}
+    if filename is not None:
+        update_expression += ", #filename = :filename"
+        attribute_names["#filename"] = "filename"
+        attribute_values[":filename"] = {"S": filename}
+    try:
+        lock_update_item(
+            UpdateExpression=update_expression,
+            ExpressionAttributeNames=attribute_names,
+            ExpressionAttributeValues=attribute_values,
+        )
+        logger.info("Successfully set lock to '%s'.", value)
+    except ClientError as e:
+        logger.error(
+            "Error setting lock in table '%s': %s", DYNAMODB_LOCK_TABLE_NAME, e
+        )
+        raise HTTPException(
+            status_code=500,
+            detail="Error communicating with AWS DynamoDB to set the lock",
+        )
+
+
+def acquire_lock(who_are_you: str) -> tuple[bool, dict[str, str]]:
+    """
+    Atomically sets the lock to 'who_are_you' if a save filename is known and the lock
+    is 'unlocked', not set yet, or already held by 'who_are_you' (so the holder can
+    retry a download that did not complete).
+    Returns whether the lock was acquired, along with the lock item as it was before
+    the update, or when the update was refused.
+    """
+    try:
+        response = lock_update_item(
+            UpdateExpression="SET #owner = :who",
+            ConditionExpression="attribute_exists(#filename) AND (attribute_not_exists(#owner) OR #owner = :unlocked OR #owner = :who)",
+            ExpressionAttributeNames={"#owner": "owner", "#filename": "filename"},
+            ExpressionAttributeValues={
+                ":who": {"S": who_are_you},
+                ":unlocked": {"S": LOCK_VALUE_UNLOCKED},
+            },
+            ReturnValues="ALL_OLD",
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
+        )
+        return True, _parse_lock_item(response["Attributes"])
     except ClientError as e:
-        logger.error(f"Error setting SSM parameter '{parameter_name}': {e}")
-        if e.response["Error"]["Code"] == "ParameterAlreadyExists" and not overwrite:
-            logger.info(f"Parameter '{parameter_name}' already exists, not overwriting.")
-            return True
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return False, _parse_lock_item(e.response.get("Item", {}))
+        logger.error(
+            "Error acquiring lock in table '%s': %s", DYNAMODB_LOCK_TABLE_NAME, e
+        )
         raise HTTPException(
             status_code=500,
-            detail=f"Error communicating with AWS SSM to set {parameter_name}",
+            detail="Error communicating with AWS DynamoDB to acquire the lock",
+        )
+
+
+# --- Warm-up ---
+# Prefetch the password at import so the first request of a container is served
+# from cache too. This is a single short attempt: on failure, the first request
+# fetches the password itself.
+if prefetch_ssm_client:
+    try:
+        response = prefetch_ssm_client.get_parameter(
+            Name=SSM_PASSWORD_PARAMETER_NAME, WithDecryption=True
         )
+        _ssm_cache[SSM_PASSWORD_PARAMETER_NAME] = (
+            _cache_expiry(),
+            _ssm_parameter_value(_ssm_parameter(response)),
+        )
+    except (ClientError, BotoCoreError) as e:
+        logger.warning("Could not prefetch SSM password parameter: %s", e)
 
 
 # --- API Routes ---
+# Routes are plain functions: FastAPI runs them in its threadpool, so blocking
+# boto3 calls do not stall the event loop for other requests.
 @app.get("/get")
-async def get_file(
-    background_tasks: BackgroundTasks,
-    who_are_you: str = Query(..., max_length=20),
+def get_file(
+    who_are_you: str = Query(..., pattern=WHO_ARE_YOU_PATTERN),
     password: str = Query(..., max_length=20),
 ):
     """
-    Fetches the file named in the filename SSM parameter from S3 if the API lock is 'unlocked'.
-    If unlocked, it updates the lock with the 'who_are_you' value and returns the file.
+    Fetches the last uploaded file from S3 if the API lock is 'unlocked'.
+    If unlocked, it atomically sets the lock to the 'who_are_you' value and redirects to a
+    presigned S3 URL of the file.
     Otherwise, it returns the current lock value (with the name of the last person to download).
     """
-    if not s3_client or not ssm_client:
+    if not s3_client or not ssm_client or not dynamodb_client:
         raise HTTPException(status_code=503, detail="AWS service client not available.")
 
-    app_password = get_ssm_parameter(SSM_PASSWORD_PARAMETER_NAME, with_decryption=True)
-    if app_password != password:
-        raise HTTPException(status_code=403, detail="Provided password not valid")
+    # The lock value itself would pass for an unlocked lock
+    if who_are_you == LOCK_VALUE_UNLOCKED:
+        raise HTTPException(
+            status_code=400, detail=f"'{LOCK_VALUE_UNLOCKED}' is a reserved name."
+        )
 
-    current_lock_value = get_ssm_parameter(SSM_PARAMETER_NAME)
+    if not is_valid_password(password):
+        raise HTTPException(status_code=403, detail="Provided password not valid")
 
-    if current_lock_value == LOCK_VALUE_UNLOCKED:
-        # Get the filename to download from the second SSM parameter
-        filename_to_download = get_ssm_parameter(SSM_FILENAME_PARAMETER_NAME)
-        if not filename_to_download or filename_to_download == "init":
+    # Lock before touching S3, so concurrent requests cannot both get the save
+    lock_acquired, lock = acquire_lock(who_are_you)
+    if not lock_acquired:
+        if "filename" not in lock:
             logger.error(
-                f"Filename parameter '{SSM_FILENAME_PARAMETER_NAME}' not set or is initial value."
+                "No save filename found in the lock item, nothing uploaded yet."
             )
             raise HTTPException(
                 status_code=404, detail="No valid save filename found to download."
             )
-
-        logger.info(
-            f"API is unlocked. Attempting to download '{filename_to_download}' for '{who_are_you}'."
-        )
-
-        # Create a temporary file to download to
-        temp_dir = tempfile.TemporaryDirectory()
-        try:
-            # Use the filename retrieved from SSM as the S3 Key
-            local_path = os.path.join(temp_dir.name, filename_to_download)
-            s3_client.download_file(S3_BUCKET_NAME, filename_to_download, local_path)
-            logger.info(
-                f"Successfully downloaded '{filename_to_download}' to '{local_path}'."
-            )
-
-            # Update SSM parameter to lock it
-            if set_ssm_parameter(SSM_PARAMETER_NAME, who_are_you, overwrite=True):
-                logger.info(f"Locked API with value: '{who_are_you}'.")
-                # Return file using the retrieved filename
-                background_tasks.add_task(clean_temp_dir, temp_dir)
-                return FileResponse(
-                    path=local_path,
-                    filename=filename_to_download,  # Use the actual filename
-                    media_type="application/octet-stream",
-                )
-            else:
-                background_tasks.add_task(clean_temp_dir, temp_dir)
-                raise HTTPException(
-                    status_code=500,
-                    detail="Failed to update API lock after download.",
-                )
-
-        except ClientError as e:
-            background_tasks.add_task(clean_temp_dir, temp_dir)
-            if (
-                e.response["Error"]["Code"] == "NoSuchKey"
-                or e.response["Error"]["Code"] == "404"
-            ):
-                logger.error(
-                    f"File '{filename_to_download}' not found in bucket '{S3_BUCKET_NAME}'."
-                )
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Save file '{filename_to_download}' not found in S3.",
-                )
-            else:
-                logger.error(f"Error downloading file from S3: {e}")
-                raise HTTPException(
-                    status_code=500, detail="Error downloading file from S3."
-                )
-
-    else:
+        current_lock_value = lock.get("owner")
         logger.info(
-            f"API is locked or parameter not found. Current value: '{current_lock_value}'. Request by '{who_are_you}'."
+            "API is locked. Current value: '%s'. Request by '%s'.",
+            current_lock_value,
+            who_are_you,
         )
         raise HTTPException(
             status_code=409,
             detail=f"Cannot download as save is locked by {current_lock_value}",
         )
+    filename_to_download = lock["filename"]
+    previous_lock_value = lock.get("owner")
+    logger.info(
+        "Locked API with value: '%s'. Attempting to download '%s'.",
+        who_are_you,
+        filename_to_download,
+    )
 
+    try:
+        # Make sure the object exists, as S3 is not hit again until the client
+        # follows the redirect
+        s3_head_save(Key=filename_to_download)
+    except (ClientError, BotoCoreError) as e:
+        # Nothing was downloaded, so release the lock unless it was already held
+        if previous_lock_value != who_are_you:
+            set_lock_value(LOCK_VALUE_UNLOCKED)
+        if isinstance(e, ClientError) and (
+            e.response["Error"]["Code"] == "NoSuchKey"
+            or e.response["Error"]["Code"] == "404"
+        ):
+            logger.error(
+                "File '%s' not found in bucket '%s'.",
+                filename_to_download,
+                S3_BUCKET_NAME,
+            )
+            raise HTTPException(
+                status_code=404,
+                detail=f"Save file '{filename_to_download}' not found in S3.",
+            )
+        else:
+            logger.error("Error downloading file from S3: %s", e)
+            raise HTTPException(
+                status_code=500, detail="Error downloading file from S3."
+            )
 
-def clean_temp_dir(temp_dir: tempfile.TemporaryDirectory) -> None:
-    temp_dir.cleanup()
+    # Let the client fetch the file from S3 directly
+    presigned_url = s3_client.generate_presigned_url(
+        "get_object",
+        Params={
+            "Bucket": S3_BUCKET_NAME,
+            "Key": filename_to_download,
+            "ResponseContentDisposition": f'attachment; filename="{filename_to_download}"',
+        },
+        ExpiresIn=PRESIGNED_URL_EXPIRY,
+    )
+    return RedirectResponse(presigned_url, status_code=307)
 
 
 @app.post("/post")
-async def upload_file(
-    who_are_you: str = Query(..., max_length=20),
+def upload_file(
+    who_are_you: str = Query(..., pattern=WHO_ARE_YOU_PATTERN),
     password: str = Query(..., max_length=20),
     file: UploadFile = File(...),
 ):
     """
     Uploads a file to S3 if the API lock is not 'unlocked'.
-    If the lock SSM parameter doesn't exist, it creates it with value 'unlocked'.
-    Updates the filename SSM parameter with the name of the uploaded file.
+    Once uploaded, the lock is set back to 'unlocked'.
+    Stores the name of the uploaded file along with the lock.
     """
-    if not s3_client or not ssm_client:
+    if not s3_client or not ssm_client or not dynamodb_client:
         raise HTTPException(status_code=503, detail="AWS service client not available.")
 
-    app_password = get_ssm_parameter(SSM_PASSWORD_PARAMETER_NAME, with_decryption=True)
-    if app_password != password:
+    # The lock value itself would pass for an unlocked lock
+    if who_are_you == LOCK_VALUE_UNLOCKED:
+        raise HTTPException(
+            status_code=400, detail=f"'{LOCK_VALUE_UNLOCKED}' is a reserved name."
+        )
+
+    if not is_valid_password(password):
         raise HTTPException(status_code=403, detail="Provided password not valid")
 
     logger.info(
-        f"Received upload request from '{who_are_you}'. Uploading filename: '{file.filename}'"
+        "Received upload request from '%s'. Uploading filename: '%s'",
+        who_are_you,
+        file.filename,
     )
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="Filename cannot be empty.")
+    # Close the uploaded file exactly once, whatever the outcome
+    try:
+        if not file.filename:
+            raise HTTPException(status_code=400, detail="Filename cannot be empty.")
 
-    current_lock_value = get_ssm_parameter(SSM_PARAMETER_NAME)
+        current_lock_value = get_lock_value()
+
+        # Check lock status
+        if current_lock_value == LOCK_VALUE_UNLOCKED:
+            logger.warning(
+                "Upload attempt by '%s' rejected. API lock is currently '%s'.",
+                who_are_you,
+                LOCK_VALUE_UNLOCKED,
+            )
+            raise HTTPException(
+                status_code=409,
+                detail="Cannot upload: API lock is 'unlocked', indicating a file may already be present and downloadable.",
+            )
 
-    # Check lock status
-    if current_lock_value != LOCK_VALUE_UNLOCKED:
         logger.info(
-            f"API lock is not '{LOCK_VALUE_UNLOCKED}' (current: '{current_lock_value}'). Proceeding with upload."
+            "API lock is not '%s' (current: '%s'). Proceeding with upload.",
+            LOCK_VALUE_UNLOCKED,
+            current_lock_value,
         )
         try:
             # Use the actual uploaded filename as the S3 Key
-            s3_client.upload_fileobj(
+            s3_upload_save(
                 file.file,
-                S3_BUCKET_NAME,
-                file.filename,  # Use the provided filename as S3 key
-            )
-            logger.info(
-                f"Successfully uploaded file as '{file.filename}' in bucket '{S3_BUCKET_NAME}'."
+                Key=file.filename,  # Use the provided filename as S3 key
             )
-
-            # After successful upload, update the filename parameter
-            logger.info(
-                f"Updating filename parameter '{SSM_FILENAME_PARAMETER_NAME}' to '{file.filename}'."
-            )
-            if not set_ssm_parameter(
-                SSM_FILENAME_PARAMETER_NAME, file.filename, overwrite=True
-            ):
-                # This is problematic - upload succeeded but tracking failed.
-                # Might need manual reset then
-                logger.error(
-                    f"CRITICAL: Failed to update filename SSM parameter '{SSM_FILENAME_PARAMETER_NAME}' after S3 upload."
-                )
-                raise HTTPException(
-                    status_code=500,
-                    detail="File uploaded but failed to update tracking parameter.",
-                )
-            set_ssm_parameter(SSM_PARAMETER_NAME, LOCK_VALUE_UNLOCKED, overwrite=True)
-            logger.info(f"State lock set to {LOCK_VALUE_UNLOCKED}.")
-            return {
-                "message": f"File '{file.filename}' uploaded successfully by '{who_are_you}'."
-            }
-
         except ClientError as e:
-            logger.error(f"Error uploading file to S3: {e}")
+            logger.error("Error uploading file to S3: %s", e)
             raise HTTPException(status_code=500, detail="Error uploading file to S3.")
-        finally:
-            await file.close()
-    else:
-        logger.warning(
-            f"Upload attempt by '{who_are_you}' rejected. API lock is currently '{LOCK_VALUE_UNLOCKED}'."
-        )
-        await file.close()
-        raise HTTPException(
-            status_code=409,
-            detail="Cannot upload: API lock is 'unlocked', indicating a file may already be present and downloadable.",
+        logger.info(
+            "Successfully uploaded file as '%s' in bucket '%s'.",
+            file.filename,
+            S3_BUCKET_NAME,
         )
 
+        # After successful upload, track the filename and unlock in one write
+        set_lock_value(LOCK_VALUE_UNLOCKED, filename=file.filename)
+        logger.info("State lock set to %s.", LOCK_VALUE_UNLOCKED)
+        return {
+            "message": f"File '{file.filename}' uploaded successfully by '{who_are_you}'."
+        }
+    finally:
+        file.file.close()
+
 
 # --- Mangum Handler for AWS Lambda ---
 handler = Mangum(app)
@@ -272,18 +489,17 @@ if __name__ == "__main__":
 
     if (
         not S3_BUCKET_NAME
-        or not SSM_PARAMETER_NAME
-        or not SSM_FILENAME_PARAMETER_NAME
+        or not DYNAMODB_LOCK_TABLE_NAME
         or not SSM_PASSWORD_PARAMETER_NAME
     ):
         print(
-            "ERROR: Set S3_BUCKET_NAME, SSM_PARAMETER_NAME, SSM_FILENAME_PARAMETER_NAME and SSM_PASSWORD_PARAMETER_NAME environment variables for local testing."
+            "ERROR: Set S3_BUCKET_NAME, DYNAMODB_LOCK_TABLE_NAME and SSM_PASSWORD_PARAMETER_NAME environment variables for local testing."
         )
     else:
         print(f"Starting Uvicorn server locally...")
         print(f"Using Region: {AWS_REGION}")
         print(f"Using Bucket: {S3_BUCKET_NAME}")
-        print(f"Using Lock Param: {SSM_PARAMETER_NAME}")
-        print(f"Using Filename Param: {SSM_FILENAME_PARAMETER_NAME}")
+        print(f"Using Lock Table: {DYNAMODB_LOCK_TABLE_NAME}")
         print(f"Using Password Param: {SSM_PASSWORD_PARAMETER_NAME}")
-        uvicorn.run(app, host="0.0.0.0", port=8000)
+        # uvicorn picks uvloop and httptools when installed (requirements-local.txt)
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=os.cpu_count())
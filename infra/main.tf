@@ -36,37 +36,25 @@ resource "aws_s3_bucket_public_access_block" "data_bucket_access_block" {
   restrict_public_buckets = true
 }
 
-# --- SSM Parameters ---
-resource "aws_ssm_parameter" "api_lock" {
-  name        = var.ssm_parameter_name
-  description = "Lock status for the API"
-  type        = "String"
-  value       = var.ssm_initial_value
-  tags = {
-    Name      = var.ssm_parameter_name
-    Project   = var.project_name
-    ManagedBy = "Terraform"
-  }
-  lifecycle {
-    ignore_changes = [ value ]
+# --- DynamoDB Lock Table ---
+resource "aws_dynamodb_table" "api_lock" {
+  name         = var.dynamodb_lock_table_name
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "lock_id"
+
+  attribute {
+    name = "lock_id"
+    type = "S"
   }
-}
 
-resource "aws_ssm_parameter" "api_filename" {
-  name        = var.ssm_filename_parameter_name
-  description = "Name of the last successfully uploaded file"
-  type        = "String"
-  value       = var.ssm_initial_value
   tags = {
-    Name      = var.ssm_filename_parameter_name
+    Name      = var.dynamodb_lock_table_name
     Project   = var.project_name
     ManagedBy = "Terraform"
   }
-  lifecycle {
-    ignore_changes = [ value ]
-  }
 }
 
+# --- SSM Parameters ---
 data "aws_kms_key" "this" {
   key_id = "alias/aws/ssm"
 }
@@ -127,12 +115,11 @@ data "aws_iam_policy_document" "lambda_permissions_policy" {
 
   statement {
     actions = [
-      "ssm:GetParameter",
-      "ssm:PutParameter"
+      "dynamodb:GetItem",
+      "dynamodb:UpdateItem"
     ]
     resources = [
-      aws_ssm_parameter.api_lock.arn,
-      aws_ssm_parameter.api_filename.arn
+      aws_dynamodb_table.api_lock.arn
     ]
   }
 
@@ -193,8 +180,7 @@ resource "aws_lambda_function" "api_lambda" {
   environment {
     variables = {
       S3_BUCKET_NAME              = aws_s3_bucket.data_bucket.id
-      SSM_PARAMETER_NAME          = aws_ssm_parameter.api_lock.name
-      SSM_FILENAME_PARAMETER_NAME = aws_ssm_parameter.api_filename.name
+      DYNAMODB_LOCK_TABLE_NAME    = aws_dynamodb_table.api_lock.name
       SSM_PASSWORD_PARAMETER_NAME = aws_ssm_parameter.api_password.name
     }
   }
@@ -218,8 +204,11 @@ resource "aws_cloudwatch_log_group" "lambda_log_group" {
 }
 
 # --- Lambda Function URL ---
+# Python runtimes do not support RESPONSE_STREAM, downloads are redirected to
+# presigned S3 URLs instead so responses stay small
 resource "aws_lambda_function_url" "api_url" {
   function_name      = aws_lambda_function.api_lambda.function_name
   authorization_type = "NONE"
+  invoke_mode        = "BUFFERED"
   depends_on         = [aws_lambda_function.api_lambda]
 }
@@ -24,17 +24,12 @@ output "s3_bucket_arn" {
   value       = aws_s3_bucket.data_bucket.arn
 }
 
-output "ssm_lock_parameter_name" {
-  description = "Name of the created SSM Parameter for lock status"
-  value       = aws_ssm_parameter.api_lock.name
-}
-
-output "ssm_filename_parameter_name" {
-  description = "Name of the created SSM Parameter for the filename"
-  value       = aws_ssm_parameter.api_filename.name
+output "dynamodb_lock_table_name" {
+  description = "Name of the created DynamoDB table for lock status"
+  value       = aws_dynamodb_table.api_lock.name
 }
 
 output "ssm_password_parameter_name" {
-  description = "Name of the created SSM Parameter for the filename"
-  value       = aws_ssm_parameter.api_filename.name
+  description = "Name of the created SSM Parameter for the password"
+  value       = aws_ssm_parameter.api_password.name
 }
\ No newline at end of file
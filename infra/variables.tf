@@ -10,16 +10,10 @@ variable "project_name" {
   default     = "lotrrtm-shared-save"
 }
 
-variable "ssm_parameter_name" {
-  description = "Name for the SSM Parameter storing the lock status"
+variable "dynamodb_lock_table_name" {
+  description = "Name for the DynamoDB table storing the lock status"
   type        = string
-  default     = "lotrrtm-shared-save-lock_state"
-}
-
-variable "ssm_filename_parameter_name" {
-  description = "Name for the SSM Parameter storing the last uploaded filename"
-  type        = string
-  default     = "lotrrtm-shared-save-last_filename"
+  default     = "lotrrtm-shared-save-lock"
 }
 
 variable "ssm_password_parameter_name" {
@@ -28,12 +22,6 @@ variable "ssm_password_parameter_name" {
   default     = "lotrrtm-shared-save-password"
 }
 
-variable "ssm_initial_value" {
-  description = "Initial value for the SSM Parameters"
-  type        = string
-  default     = "init"
-}
-
 variable "ssm_password_value" {
   description = "Initialize your own password for the app through env variables"
   type = string
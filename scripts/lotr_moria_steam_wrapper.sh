@@ -80,7 +80,8 @@ download_save_file() {
   log "=> Call: $FUNCNAME $@"
 
   log "[$FUNCNAME] Downloading save file"
-  r=$(call_api "GET" "${DOWNLOAD_SAVE_URL}?who_are_you=${USERNAME}&password=${PASSWORD}")
+  # -L: the API answers with a redirect to the save file on S3
+  r=$(call_api "GET" "${DOWNLOAD_SAVE_URL}?who_are_you=${USERNAME}&password=${PASSWORD}" -L)
   http_code="$(echo $r | cut -d':' -f1)"; f="$(echo $r | cut -d':' -f2)"
   log "[$FUNCNAME] Save file downloaded (${http_code}): $f"
 